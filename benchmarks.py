@@ -13,3 +13,10 @@ if __name__ == '__main__':
     routes_.add('api/id', controller)
 
     print(timeit.timeit(functools.partial(routes_.match, 'api/id/baz/last'), number=150000))
+
+    routes_ = routes.Routes(cache_size=0)
+    routes_.add(':foo/:bar/:baz/:last', controller)
+    routes_.add('api/:bar/:baz/:last', controller)
+    routes_.add('api/id', controller)
+
+    print(timeit.timeit(functools.partial(routes_.match, 'api/id/baz/last'), number=150000))
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import types
+import weakref
+import itertools
+import functools
 import collections
 from typing import (
     Tuple,
@@ -7,7 +11,8 @@ from typing import (
     Sequence,
     Any,
     Dict,
-    Union)
+    Union,
+    Optional)
 
 
 __all__ = [
@@ -15,9 +20,6 @@ __all__ = [
     'Routes',
     'RouteResolved']
 
-# This is a nested structure similar to a linked-list
-VariablePartsType = Tuple[tuple, Tuple[str, str]]
-
 
 class RouteError(Exception):
     """Base error for any exception raised by Kua"""
@@ -44,69 +46,283 @@ def normalize_url(url: str) -> str:
 
     :private:
     """
-    if url.startswith('/'):
-        url = url[1:]
+    return url.strip('/')
 
-    if url.endswith('/'):
-        url = url[:-1]
 
-    return url
+def _format_depth(depth: Tuple[Union[str, None], int]) -> str:
+    """
+    Format a depth as a Python expression
 
+    :param depth: A ``(variable name, offset)`` pair.\
+    The name is ``None`` for a fixed depth
+    :return: The expression
 
-def _unwrap(variable_parts: VariablePartsType):
+    :private:
     """
-    Yield URL parts. The given parts are usually in reverse order.
+    name, offset = depth
+
+    if name is None:
+        return str(offset)
+
+    if not offset:
+        return name
+
+    if offset < 0:
+        return '{} - {}'.format(name, -offset)
+
+    return '{} + {}'.format(name, offset)
+
+
+class _Node:
     """
-    curr_parts = variable_parts
-    var_any = []
+    Partial route, a node of the routes graph
 
-    while curr_parts:
-        curr_parts, (var_type, part) = curr_parts
+    :ivar statics: Partial routes by static part
+    :ivar var: Partial route of a ``:var``
+    :ivar var_any: Partial route of a ``:*var``
+    :ivar route: Route ending here
 
-        if var_type == Routes._VAR_ANY_NODE:
-            var_any.append(part)
-            continue
+    :private:
+    """
 
-        if var_type == Routes._VAR_ANY_BREAK:
-            if var_any:
-                yield tuple(reversed(var_any))
-                var_any.clear()
+    __slots__ = ('statics', 'var', 'var_any', 'route')
 
-            var_any.append(part)
-            continue
+    def __init__(self) -> None:
+        self.statics = {}  # type: Dict[str, _Node]
+        self.var = None  # type: Optional[_Node]
+        self.var_any = None  # type: Optional[_Node]
+        self.route = None  # type: Optional[_Route]
+
+
+def _static_chain(curr: _Node) -> Tuple[List[str], _Node]:
+    """
+    Follow the partial routes with\
+    a single static part and nothing else
+
+    :param curr: Partial route
+    :return: The static parts and\
+    the partial route at the end of the chain
+
+    :private:
+    """
+    chain = []
+
+    while (len(curr.statics) == 1 and
+           curr.var is None and
+           curr.var_any is None and
+           curr.route is None):
+        (part, curr), = curr.statics.items()
+        chain.append(part)
+
+    return chain, curr
+
+
+# Min and max number of parts, max is None when unbounded
+BoundsType = Tuple[int, Optional[int]]
+
+
+def _merge_bounds(a: Optional[BoundsType], b: BoundsType) -> BoundsType:
+    """
+    Bounds that contain both bounds
+
+    :param a: Bounds or ``None``
+    :param b: Bounds
+    :return: Merged bounds
+
+    :private:
+    """
+    if a is None:
+        return b
+
+    if a[1] is None or b[1] is None:
+        return min(a[0], b[0]), None
+
+    return min(a[0], b[0]), max(a[1], b[1])
+
+
+def _shift_bounds(bounds: BoundsType, offset: int) -> BoundsType:
+    """
+    Add a number of parts to the bounds
+
+    :param bounds: Bounds
+    :param offset: Number of parts
+    :return: Shifted bounds
+
+    :private:
+    """
+    if bounds[1] is None:
+        return bounds[0] + offset, None
 
-        if var_any:
-            yield tuple(reversed(var_any))
-            var_any.clear()
-            yield part
+    return bounds[0] + offset, bounds[1] + offset
+
+
+def _within_bounds(inner: BoundsType, outer: BoundsType) -> bool:
+    """
+    Check the bounds are within other bounds
+
+    :param inner: Bounds
+    :param outer: Bounds that may contain the inner bounds
+    :return: Whether the inner bounds are within the outer bounds
+
+    :private:
+    """
+    if inner[0] < outer[0]:
+        return False
+
+    if outer[1] is None:
+        return True
+
+    return inner[1] is not None and inner[1] <= outer[1]
+
+
+def _intersect_bounds(a: BoundsType, b: BoundsType) -> BoundsType:
+    """
+    Bounds contained by both bounds
+
+    :param a: Bounds
+    :param b: Bounds
+    :return: Intersected bounds
+
+    :private:
+    """
+    if a[1] is None:
+        return max(a[0], b[0]), b[1]
+
+    if b[1] is None:
+        return max(a[0], b[0]), a[1]
+
+    return max(a[0], b[0]), min(a[1], b[1])
+
+
+def _next_bounds(
+        curr: _Node,
+        bounds: Dict[int, BoundsType]) -> Optional[BoundsType]:
+    """
+    Calculate the min and max number of parts\
+    to match from the next part of a partial\
+    route to the end of a route
+
+    :param curr: Partial route
+    :param bounds: Bounds by partial route ID,\
+    this gets filled up
+    :return: Bounds or ``None`` if\
+    the partial route has no branches
+
+    :private:
+    """
+    result = None
+    partials = list(curr.statics.values())
+
+    if curr.var is not None:
+        partials.append(curr.var)
+
+    for partial in partials:
+        result = _merge_bounds(
+            result, _shift_bounds(_depth_bounds(partial, bounds), 1))
+
+    if curr.var_any is not None:
+        result = _merge_bounds(
+            result,
+            (_depth_bounds(curr.var_any, bounds)[0] + 1, None))
+
+    return result
+
+
+def _depth_bounds(curr: _Node, bounds: Dict[int, BoundsType]) -> BoundsType:
+    """
+    Calculate the min and max number of parts\
+    to match from a partial route to the end of a route.
+
+    The partial routes are visited in post-order\
+    with a stack rather than recursion,\
+    since patterns may be very deep
+
+    :param curr: Partial route
+    :param bounds: Bounds by partial route ID,\
+    this gets filled up
+    :return: Bounds
+
+    :private:
+    """
+    try:
+        return bounds[id(curr)]
+    except KeyError:
+        pass
+
+    to_visit = [(curr, False)]
+
+    while to_visit:
+        partial, is_visited = to_visit.pop()
+
+        if not is_visited:
+            to_visit.append((partial, True))
+            to_visit.extend(
+                (child, False)
+                for child in itertools.chain(
+                    partial.statics.values(),
+                    (partial.var, partial.var_any))
+                if child is not None and id(child) not in bounds)
             continue
 
-        yield part
+        # The children are done, so this does not recurse
+        result = _next_bounds(partial, bounds)
+
+        if partial.route is not None:
+            result = _merge_bounds(result, (0, 0))
 
-    if var_any:
-        yield tuple(reversed(var_any))
+        bounds[id(partial)] = result
 
+    return bounds[id(curr)]
 
-def make_params(
-        key_parts: Sequence[str],
-        variable_parts: VariablePartsType) -> Dict[str, Union[str, Tuple[str]]]:
+
+def _format_bounds(
+        depth: Tuple[Union[str, None], int],
+        bounds: BoundsType) -> str:
     """
-    Map keys to variables. This map\
-    URL-pattern variables to\
-    a URL related parts
+    Format a check of the number of URL\
+    parts as a Python expression
 
-    :param key_parts: A list of URL parts
-    :param variable_parts: A linked-list\
-    (ala nested tuples) of URL parts
-    :return: The param dict with the values\
-    assigned to the keys
+    :param depth: Depth the bounds start at
+    :param bounds: Bounds
+    :return: The expression
 
     :private:
     """
-    # The unwrapped variable parts are in reverse order.
-    # Instead of reversing those we reverse the key parts
-    # and avoid the O(n) space required for reversing the vars
-    return dict(zip(reversed(key_parts), _unwrap(variable_parts)))
+    name, offset = depth
+    low, high = bounds
+
+    if high is None:
+        return 'n >= {}'.format(_format_depth((name, offset + low)))
+
+    if low == high:
+        return 'n == {}'.format(_format_depth((name, offset + low)))
+
+    return '{} <= n <= {}'.format(
+        _format_depth((name, offset + low)),
+        _format_depth((name, offset + high)))
+
+
+# Max indentation level of the generated code
+_MAX_INDENT = 32
+
+# Max number of nested any-var loops of the generated
+# code, the compiler allows 20 nested blocks at most
+_MAX_LOOPS = 16
+
+# Max number of partial routes compiled into
+# a single function, this bounds the recursion
+# of the compiler on deep patterns
+_MAX_LEVELS = 64
+
+# Max number of static branches of a partial
+# route to compare one by one, a dict is used
+# to dispatch to the branch above this
+_DISPATCH_MIN = 8
+
+
+_Compiling = collections.namedtuple(
+    '_Compiling',
+    ['namespace', 'functions', 'tables', 'pending', 'names', 'bounds'])
 
 
 _Route = collections.namedtuple(
@@ -128,6 +344,10 @@ RouteResolved.__doc__ = (
     registering it
     """)
 
+# Build a RouteResolved without going through
+# the Python level __new__ of the namedtuple
+_new_tuple = tuple.__new__
+
 
 class Routes:
     """
@@ -166,150 +386,496 @@ class Routes:
             # Do something useful here
             pass
 
+        # Or without exceptions
+        route = routes.try_match('bad-url/some')
+        if route is None:
+            raise ValueError('Not found 404')
+
     :ivar max_depth: The maximum URL depth\
     (number of parts) willing to match. This only\
     takes effect when one or more URLs matcher\
     make use of any-var (i.e: ``:*var``), otherwise the\
     depth of the deepest URL is taken.
+    :ivar cache_size: The maximum number of\
+    matched URLs to cache. Set it to zero\
+    to disable the cache.
     """
 
-    _VAR_NODE = ':var'
-    _VAR_ANY_NODE = ':*var'
-    _ROUTE_NODE = ':route'
-
-    _VAR_ANY_BREAK = ':*break'
-
-    def __init__(self, max_depth: int=40) -> None:
+    def __init__(self, max_depth: int=40, cache_size: int=1024) -> None:
         """
         :ivar _routes: \
         Contain a graph with the parts of\
         each URL pattern. This is referred as\
         "partial route" later in the docs.
-        :vartype _routes: dict
+        :vartype _routes: _Node
         :ivar _max_depth: Depth of the deepest\
         registered pattern
         :vartype _max_depth: int
+        :ivar _compiled: All the registered\
+        patterns compiled into a matcher function.\
+        ``None`` until the first match\
+        after adding a route
+        :vartype _compiled: callable
+        :ivar _static: Patterns with no variables\
+        by URL, these are matched with a dict lookup
+        :vartype _static: dict
+        :ivar _has_variables: Whether any\
+        registered pattern has variables
+        :vartype _has_variables: bool
+        :ivar _cache_size: Max number of matches to cache
+        :vartype _cache_size: int
+        :ivar _match_cached: Cached version\
+        of ``_match``, misses are cached too
+        :vartype _match_cached: callable
 
         :private-vars:
         """
         self._max_depth_custom = max_depth
         # Routes graph format for 'foo/:foobar/bar':
-        # {
-        #   'foo': {
-        #       ':var': {
-        #           'bar': {
-        #               ':route': _Route(),
-        #               ...
-        #           },
-        #           ...
-        #        }
-        #        ...
-        #   },
-        #   ...
-        # }
-        self._routes = {}
+        # _Node(statics={
+        #   'foo': _Node(var=_Node(statics={
+        #       'bar': _Node(route=_Route()),
+        #       ...}),
+        #       ...),
+        #   ...})
+        self._routes = _Node()
         self._max_depth = 0
+        self._compiled = None
+        self._static = {}
+        self._has_variables = False
+        self._cache_size = cache_size
+        self._match_cached = self._new_match_cached()
 
-    def _deconstruct_url(self, url: str) -> List[str]:
+    def __getstate__(self) -> Dict[str, Any]:
         """
-        Split a regular URL into parts
+        Drop the cache and the compiled matcher,\
+        these can't be copied nor pickled.\
+        The matcher gets compiled again\
+        on the first match
 
-        :param url: A normalized URL
-        :return: Parts of the URL
-        :raises kua.routes.RouteError: \
-        If the depth of the URL exceeds\
-        the max depth of the deepest\
-        registered pattern
+        :return: State to copy
 
         :private:
         """
-        parts = url.split('/', self._max_depth + 1)
+        state = self.__dict__.copy()
+        del state['_match_cached']
+        state['_compiled'] = None
+        return state
 
-        if depth_of(parts) > self._max_depth:
-            raise RouteError('No match')
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """
+        Restore the state and create a new cache
+
+        :param state: Copied state
+
+        :private:
+        """
+        self.__dict__.update(state)
+        self._match_cached = self._new_match_cached()
+
+    def _new_match_cached(self) -> Any:
+        """
+        Create a cached version of ``_match``.\
+        It's bound to a weak proxy of the routes,\
+        so there is no reference cycle\
+        through the cache
+
+        :return: Cached ``_match``
+
+        :private:
+        """
+        return functools.lru_cache(maxsize=self._cache_size)(
+            types.MethodType(Routes._match, weakref.proxy(self)))
+
+    def _compile_partial(
+            self,
+            curr: _Node,
+            depth: Tuple[Union[str, None], int],
+            var_parts: Tuple[str, ...],
+            indent: int,
+            loops: int,
+            levels: int,
+            lines: List[str],
+            compiling: _Compiling,
+            known: BoundsType) -> None:
+        """
+        Generate the matcher code of a partial route.
+
+        Branches are tried in order\
+        ``static > var > any-var``. A branch\
+        that does not match falls through\
+        into the next one, that's the backtracking.
+
+        :param curr: Partial route
+        :param depth: Depth of the part to match,\
+        as a ``(variable name, offset)`` pair.\
+        The name is ``None`` for a fixed depth
+        :param var_parts: Expressions of the\
+        variables matched so far
+        :param indent: Indentation level
+        :param loops: Number of nested loops
+        :param levels: Number of partial routes\
+        compiled so far into the function
+        :param lines: Lines of code, this gets filled up
+        :param compiling: Compilation state
+        :param known: Bounds of the number of URL\
+        parts left from the depth, already checked\
+        by the outer branches
+
+        :private:
+        """
+        if (indent > _MAX_INDENT or
+                loops >= _MAX_LOOPS or
+                levels >= _MAX_LEVELS):
+            # Too deep for a single function, the parser
+            # has an indentation limit, the compiler
+            # has a nested blocks limit and
+            # this has a recursion limit
+            self._compile_call_lines(
+                self._compile_function(curr, len(var_parts), compiling),
+                depth, var_parts, indent, lines)
+            return
+
+        pad = '    ' * indent
+        depth_expr = _format_depth(depth)
+
+        if curr.route is not None:
+            route = curr.route
+            anything = '_anything_{}'.format(next(compiling.names))
+            compiling.namespace[anything] = route.anything
+            route_pad = pad
+
+            if known != (0, 0):
+                lines.append('{}if n == {}:'.format(pad, depth_expr))
+                route_pad += '    '
+
+            # The first variable wins when a name is repeated
+            params = {}  # type: Dict[str, str]
+
+            for key, var_part in zip(route.key_parts, var_parts):
+                params.setdefault(key, var_part)
+
+            lines.append('{}return _new(_RouteResolved, ({{{}}}, {}))'.format(
+                route_pad,
+                ', '.join(
+                    '{!r}: {}'.format(key, var_part)
+                    for key, var_part in params.items()),
+                anything))
+
+        statics = curr.statics
+        next_bounds = _next_bounds(curr, compiling.bounds)
+
+        if next_bounds is None:
+            return
+
+        # Skip the branches when the URL is too
+        # short or too long for all of the routes
+        if not _within_bounds(known, next_bounds):
+            lines.append('{}if {}:'.format(
+                pad, _format_bounds(depth, next_bounds)))
+            indent += 1
+            known = _intersect_bounds(known, next_bounds)
+
+        pad = '    ' * indent
+        part_name = 'part_{}'.format(next(compiling.names))
+
+        # The any-var reads its parts by slicing
+        if statics or curr.var is not None:
+            lines.append('{}{} = parts[{}]'.format(
+                pad, part_name, depth_expr))
+
+        next_depth = (depth[0], depth[1] + 1)
+
+        if len(statics) > _DISPATCH_MIN:
+            # Pick the static branch with a dict lookup,
+            # rather than comparing every part
+            table = '_dispatch_{}'.format(next(compiling.names))
+            compiling.tables.append('{} = {{{}}}'.format(
+                table,
+                ', '.join(
+                    '{!r}: {}'.format(
+                        part,
+                        self._compile_function(
+                            partial, len(var_parts), compiling))
+                    for part, partial in statics.items())))
+            match_name = 'match_{}'.format(next(compiling.names))
+            lines.append('{}{} = {}.get({})'.format(
+                pad, match_name, table, part_name))
+            lines.append('{}if {} is not None:'.format(pad, match_name))
+            self._compile_call_lines(
+                match_name, next_depth, var_parts,
+                indent + 1, lines)
+        else:
+            for part, partial in statics.items():
+                # Match the whole chain of single static
+                # parts at once, like a radix tree would
+                chain, partial = _static_chain(partial)
+                conditions = ['{} == {!r}'.format(part_name, part)]
+                bounds = _shift_bounds(
+                    _depth_bounds(partial, compiling.bounds),
+                    1 + len(chain))
+
+                if not _within_bounds(known, bounds):
+                    conditions.append(_format_bounds(depth, bounds))
+
+                if chain:
+                    conditions.extend(
+                        'parts[{}] == {!r}'.format(
+                            _format_depth((depth[0], depth[1] + i)),
+                            chain_part)
+                        for i, chain_part in enumerate(chain, 1))
+
+                lines.append('{}if {}:'.format(
+                    pad, ' and '.join(conditions)))
+                self._compile_partial(
+                    partial, (depth[0], depth[1] + 1 + len(chain)),
+                    var_parts, indent + 1, loops, levels + 1,
+                    lines, compiling,
+                    _shift_bounds(
+                        _intersect_bounds(known, bounds),
+                        -1 - len(chain)))
+
+        if curr.var is not None:
+            var_indent = indent
+            bounds = _shift_bounds(
+                _depth_bounds(curr.var, compiling.bounds), 1)
+
+            if not _within_bounds(known, bounds):
+                lines.append('{}if {}:'.format(
+                    pad, _format_bounds(depth, bounds)))
+                var_indent += 1
+
+            self._compile_partial(
+                curr.var, next_depth,
+                var_parts + (part_name,),
+                var_indent, loops, levels + 1, lines, compiling,
+                _shift_bounds(_intersect_bounds(known, bounds), -1))
+
+        if curr.var_any is not None:
+            # Non-greedy, consume one part at a time.
+            # Only the ends that leave a number of
+            # parts within the bounds are tried
+            bounds = _depth_bounds(curr.var_any, compiling.bounds)
+            start = _format_depth(next_depth)
+
+            if bounds[1] is not None:
+                start = 'max({}, {})'.format(
+                    start, _format_depth(('n', -bounds[1])))
+
+            depth_name = 'depth_{}'.format(next(compiling.names))
+            lines.append('{}for {} in range({}, {}):'.format(
+                pad, depth_name, start,
+                _format_depth(('n', 1 - bounds[0]))))
+            self._compile_partial(
+                curr.var_any, (depth_name, 0),
+                var_parts + ('tuple(parts[{}:{}])'.format(
+                    depth_expr, depth_name),),
+                indent + 1, loops + 1, levels + 1,
+                lines, compiling, bounds)
+
+    def _compile_function(
+            self,
+            curr: _Node,
+            var_count: int,
+            compiling: _Compiling) -> str:
+        """
+        Schedule the matcher code of a partial\
+        route as a new function. The function\
+        takes the URL parts, the number of parts,\
+        the depth of the part to match and\
+        the variables matched so far.
+
+        The code is generated later by\
+        :py:meth:`_compile_pending`, rather\
+        than recursing from here
+
+        :param curr: Partial route
+        :param var_count: Number of\
+        variables matched so far
+        :param compiling: Compilation state
+        :return: Function name
+
+        :private:
+        """
+        function_name = '_match_{}'.format(next(compiling.names))
+        compiling.pending.append((curr, var_count, function_name))
+        return function_name
+
+    def _compile_pending(self, compiling: _Compiling) -> None:
+        """
+        Generate the code of the scheduled\
+        functions, including the ones\
+        scheduled while doing so
+
+        :param compiling: Compilation state
 
-        return parts
+        :private:
+        """
+        while compiling.pending:
+            curr, var_count, function_name = compiling.pending.pop()
+            function_lines = [
+                'def {}(parts, n, depth, var_parts):'.format(function_name)]
+            self._compile_partial(
+                curr,
+                ('depth', 0),
+                tuple('var_parts[{}]'.format(i) for i in range(var_count)),
+                1,
+                0,
+                0,
+                function_lines,
+                compiling,
+                (0, None))
+            compiling.functions.append('\n'.join(function_lines))
+
+    def _compile_call_lines(
+            self,
+            function_name: str,
+            depth: Tuple[Union[str, None], int],
+            var_parts: Tuple[str, ...],
+            indent: int,
+            lines: List[str]) -> None:
+        """
+        Generate a call to a partial route function.\
+        It returns the route, if any
+
+        :param function_name: Function name
+        :param depth: Depth of the part to match
+        :param var_parts: Expressions of the\
+        variables matched so far
+        :param indent: Indentation level of the call
+        :param lines: Lines of code, this gets filled up
+
+        :private:
+        """
+        pad = '    ' * indent
+        lines.append('{}route = {}(parts, n, {}, ({}))'.format(
+            pad,
+            function_name,
+            _format_depth(depth),
+            ''.join(var_part + ', ' for var_part in var_parts)))
+        lines.append('{}if route is not None:'.format(pad))
+        lines.append('{}    return route'.format(pad))
+
+    def compile(self) -> None:
+        """
+        Compile all the registered patterns\
+        into a matcher function.
 
-    def _match(self, parts: Sequence[str]) -> RouteResolved:
+        This is done on the first match after\
+        adding a route. Call it once all the routes\
+        are added to not pay for it on a request.
         """
-        Match URL parts to a registered pattern.
+        compiling = _Compiling(
+            namespace={
+                '_new': _new_tuple,
+                '_RouteResolved': RouteResolved},
+            functions=[],
+            tables=[],
+            pending=[],
+            names=itertools.count(),
+            bounds={})
+        lines = [
+            'def match(parts):',
+            '    n = len(parts)']
+        self._compile_partial(
+            self._routes, (None, 0), tuple(), 1, 0, 0, lines, compiling,
+            (0, None))
+        compiling.functions.append('\n'.join(lines))
+        self._compile_pending(compiling)
+        # The tables refer to the functions
+        compiling.functions.extend(compiling.tables)
+        exec(
+            compile('\n\n'.join(compiling.functions), '<kua>', 'exec'),
+            compiling.namespace)
+        self._compiled = compiling.namespace['match']
+
+    def _match(self, url: str) -> Optional[RouteResolved]:
+        """
+        Match a URL to a registered pattern.
 
         This function is basically where all\
-        the CPU-heavy work is done.
+        the CPU-heavy work is done. The patterns\
+        get compiled on the first call after\
+        adding a route.
 
-        :param parts: URL parts
-        :return: Matched route
-        :raises kua.routes.RouteError: If there is no match
+        :param url: A normalized URL
+        :return: Matched route or ``None``\
+        if there is no match
 
         :private:
         """
-        route_match = None  # type: RouteResolved
-        route_variable_parts = tuple()  # type: VariablePartsType
-        # (route_partial, variable_parts, depth)
-        to_visit = [(self._routes, tuple(), 0)]  # type: List[Tuple[dict, tuple, int]]
-
-        # Walk through the graph,
-        # keep track of all possible
-        # matching branches and do
-        # backtracking if needed
-        while to_visit:
-            curr, curr_variable_parts, depth = to_visit.pop()
-
-            try:
-                part = parts[depth]
-            except IndexError:
-                if self._ROUTE_NODE in curr:
-                    route_match = curr[self._ROUTE_NODE]
-                    route_variable_parts = curr_variable_parts
-                    break
-                else:
-                    continue
-
-            if self._VAR_ANY_NODE in curr:
-                to_visit.append((
-                    {self._VAR_ANY_NODE: curr[self._VAR_ANY_NODE]},
-                    (curr_variable_parts,
-                     (self._VAR_ANY_NODE, part)),
-                    depth + 1))
-                to_visit.append((
-                    curr[self._VAR_ANY_NODE],
-                    (curr_variable_parts,
-                     (self._VAR_ANY_BREAK, part)),
-                    depth + 1))
-
-            if self._VAR_NODE in curr:
-                to_visit.append((
-                    curr[self._VAR_NODE],
-                    (curr_variable_parts,
-                     (self._VAR_NODE, part)),
-                    depth + 1))
-
-            if part in curr:
-                to_visit.append((
-                    curr[part],
-                    curr_variable_parts,
-                    depth + 1))
-
-        if not route_match:
-            raise RouteError('No match')
+        route = self._static.get(url)
+
+        if route is not None:
+            return _new_tuple(RouteResolved, ({}, route.anything))
+
+        # Only static patterns, there is nothing else to match
+        if not self._has_variables:
+            return None
 
-        return RouteResolved(
-            params=make_params(
-                key_parts=route_match.key_parts,
-                variable_parts=route_variable_parts),
-            anything=route_match.anything)
+        if self._compiled is None:
+            self.compile()
+
+        return self._compiled(url.split('/'))
 
     def match(self, url: str) -> RouteResolved:
         """
         Match a URL to a registered pattern.
 
+        The most recently matched URLs are cached,\
+        every call returns its own ``params`` dict.
+
         :param url: URL
         :return: Matched route
         :raises kua.RouteError: If there is no match
         """
-        url = normalize_url(url)
-        parts = self._deconstruct_url(url)
-        return self._match(parts)
+        route = self.try_match(url)
+
+        if route is None:
+            raise RouteError('No match')
+
+        return route
+
+    def try_match(self, url: str) -> Optional[RouteResolved]:
+        """
+        Match a URL to a registered pattern.\
+        Same as :py:meth:`match` but it returns\
+        ``None`` instead of raising when there\
+        is no match, this is cheaper when\
+        misses are common.
+
+        :param url: URL
+        :return: Matched route or ``None``\
+        if there is no match
+        """
+        # Inlined normalize_url, this is the hot path
+        url = url.strip('/')
+
+        # Bail early on URLs deeper than the deepest pattern
+        if url.count('/') > self._max_depth:
+            return None
+
+        route = self._match_cached(url)
+
+        if route is None:
+            return None
+
+        # Copy the params, the cached
+        # route must not be mutated
+        return _new_tuple(
+            RouteResolved, (dict(route.params), route.anything))
+
+    def cache_info(self) -> functools._CacheInfo:
+        """
+        Statistics of the match cache,\
+        useful to tune ``cache_size``
+
+        :return: Named tuple of\
+        ``hits``, ``misses``, ``maxsize``\
+        and ``currsize``. Same as\
+        :py:func:`functools.lru_cache`
+        """
+        return self._match_cached.cache_info()
 
     def add(self, url: str, anything: Any) -> None:
         """
@@ -335,18 +901,35 @@ class Routes:
         for part in parts:
             if part.startswith(':*'):
                 curr_key_parts.append(part[2:])
-                part = self._VAR_ANY_NODE
                 self._max_depth = self._max_depth_custom
 
+                if curr_partial_routes.var_any is None:
+                    curr_partial_routes.var_any = _Node()
+
+                curr_partial_routes = curr_partial_routes.var_any
+
             elif part.startswith(':'):
                 curr_key_parts.append(part[1:])
-                part = self._VAR_NODE
 
-            curr_partial_routes = (curr_partial_routes
-                                   .setdefault(part, {}))
+                if curr_partial_routes.var is None:
+                    curr_partial_routes.var = _Node()
+
+                curr_partial_routes = curr_partial_routes.var
+
+            else:
+                curr_partial_routes = (curr_partial_routes.statics
+                                       .setdefault(part, _Node()))
 
-        curr_partial_routes[self._ROUTE_NODE] = _Route(
-            key_parts=curr_key_parts,
+        route = _Route(
+            key_parts=tuple(curr_key_parts),
             anything=anything)
+        curr_partial_routes.route = route
+
+        if curr_key_parts:
+            self._has_variables = True
+        else:
+            self._static[url] = route
 
         self._max_depth = max(self._max_depth, depth_of(parts))
+        self._compiled = None
+        self._match_cached.cache_clear()
@@ -1,7 +1,7 @@
-from _typeshed import Incomplete
-from typing import Any, NamedTuple, Tuple
+import functools
 
-VariablePartsType = Tuple[tuple, Tuple[str, str]]
+from _typeshed import Incomplete
+from typing import Any, NamedTuple, Optional
 
 class RouteError(Exception): ...
 
@@ -14,8 +14,11 @@ class RouteResolved(NamedTuple):
     anything: Incomplete
 
 class Routes:
-    def __init__(self, max_depth: int = ...) -> None: ...
+    def __init__(self, max_depth: int = ..., cache_size: int = ...) -> None: ...
     def match(self, url: str) -> RouteResolved: ...
+    def try_match(self, url: str) -> Optional[RouteResolved]: ...
+    def compile(self) -> None: ...
+    def cache_info(self) -> functools._CacheInfo: ...
     def add(self, url: str, anything: Any) -> None: ...
 
 # Names in __all__ with no definition:
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+import copy
+import pickle
 import logging
 
 from kua import routes
@@ -119,6 +121,144 @@ class KuaTest(unittest.TestCase):
             {'foo': 'foo', 'bar': 'bar'})
         self.assertEqual(anything, 'foo')
 
+    def test_match_static(self):
+        """
+        Should match static patterns over variables
+        """
+        self.routes.add('foo/:bar', 'foo')
+        self.routes.add('/foo/bar/', 'bar')
+        route = self.routes.match('/foo/bar')
+        self.assertDictEqual(route.params, {})
+        self.assertEqual(route.anything, 'bar')
+        route = self.routes.match('foo/baz')
+        self.assertDictEqual(route.params, {'bar': 'baz'})
+        self.assertEqual(route.anything, 'foo')
+
+    def test_match_static_only(self):
+        """
+        Should not compile the patterns when all of them are static
+        """
+        self.routes.add('foo/bar', 'foo')
+        self.assertEqual(self.routes.match('foo/bar').anything, 'foo')
+        self.assertRaises(routes.RouteError, self.routes.match, 'foo/baz')
+        self.assertIsNone(self.routes._compiled)
+
+    def test_match_cache_clear(self):
+        """
+        Should forget cached matches on add
+        """
+        self.routes.add(':foo/:bar', 'foo')
+        self.assertEqual(self.routes.match('foo/bar').anything, 'foo')
+        self.assertRaises(routes.RouteError, self.routes.match, 'foo/baz/qux')
+        self.routes.add('foo/bar', 'bar')
+        self.routes.add('foo/:baz/qux', 'baz')
+        self.assertEqual(self.routes.match('foo/bar').anything, 'bar')
+        self.assertEqual(self.routes.match('foo/baz/qux').anything, 'baz')
+
+    def test_match_cache_params(self):
+        """
+        Should not share the params between cached matches
+        """
+        self.routes.add('user/:id', 'user')
+        self.routes.match('user/1').params['id'] = 'admin'
+        self.assertDictEqual(self.routes.match('user/1').params, {'id': '1'})
+        self.routes.try_match('user/1').params['id'] = 'admin'
+        self.assertDictEqual(
+            self.routes.try_match('user/1').params, {'id': '1'})
+
+    def test_cache_size(self):
+        """
+        Should match the same with the cache disabled
+        """
+        rts = routes.Routes(cache_size=0)
+        rts.add(':foo/:bar', 'foo')
+        self.assertEqual(rts.match('foo/bar').anything, 'foo')
+        self.assertEqual(rts.match('foo/bar').anything, 'foo')
+        self.assertIsNone(rts.try_match('foo'))
+        self.assertEqual(rts.cache_info().maxsize, 0)
+        self.assertEqual(rts.cache_info().currsize, 0)
+        self.assertEqual(rts.cache_info().hits, 0)
+        rts.add('foo/bar', 'bar')
+        self.assertEqual(rts.match('foo/bar').anything, 'bar')
+
+    def test_cache_default(self):
+        """
+        Should cache matches by default
+        """
+        self.routes.add(':foo/:bar', 'foo')
+        self.assertEqual(
+            self.routes.match('foo/bar'), self.routes.match('foo/bar'))
+        self.assertEqual(self.routes.cache_info().hits, 1)
+        self.assertEqual(self.routes.cache_info().currsize, 1)
+
+    def test_deepcopy(self):
+        """
+        Should match the copy against its own routes
+        """
+        self.routes.add('a/:x', 'a')
+        self.assertEqual(self.routes.match('a/1').anything, 'a')
+        rts = copy.deepcopy(self.routes)
+        rts.add('b/:x', 'b')
+        rts.add('a/:x', 'c')
+        self.assertEqual(rts.match('b/1').anything, 'b')
+        self.assertEqual(rts.match('a/1').anything, 'c')
+        self.assertEqual(self.routes.match('a/1').anything, 'a')
+        self.assertRaises(routes.RouteError, self.routes.match, 'b/1')
+
+    def test_pickle(self):
+        """
+        Should match the same after a pickle round-trip
+        """
+        self.routes.add('a/:x', 'a')
+        self.routes.add('b', 'b')
+        self.assertEqual(self.routes.match('a/1').anything, 'a')
+        rts = pickle.loads(pickle.dumps(self.routes))
+        self.assertDictEqual(rts.match('a/1').params, {'x': '1'})
+        self.assertEqual(rts.match('a/1').anything, 'a')
+        self.assertEqual(rts.match('b').anything, 'b')
+        rts = pickle.loads(pickle.dumps(routes.Routes()))
+        self.assertIsNone(rts.try_match('a'))
+
+    def test_cache_info(self):
+        """
+        Should count cache hits and misses
+        """
+        rts = routes.Routes(cache_size=10)
+        rts.add(':foo/:bar', 'foo')
+        rts.match('foo/bar')
+        rts.match('foo/bar')
+        rts.try_match('foo/bar/baz')
+        info = rts.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.maxsize, 10)
+        self.assertEqual(info.currsize, 1)
+
+    def test_match_special_chars(self):
+        """
+        Should match special chars literally
+        """
+        self.routes.add('foo.bar/(baz)/:qux', 'foo')
+        params, anything = self.routes.match('foo.bar/(baz)/+*?')
+        self.assertDictEqual(params, {'qux': '+*?'})
+        self.assertEqual(anything, 'foo')
+        self.assertRaises(
+            routes.RouteError, self.routes.match, 'fooxbar/baz/qux')
+
+    def test_match_var_like_parts(self):
+        """
+        Should match URL parts that look like variables as regular parts
+        """
+        self.routes.add(':foo', 'foo')
+        self.routes.add('api/:*bar', 'bar')
+        route = self.routes.match(':route')
+        self.assertDictEqual(route.params, {'foo': ':route'})
+        self.assertEqual(route.anything, 'foo')
+        route = self.routes.match('api/:*var/:var')
+        self.assertDictEqual(route.params, {'bar': (':*var', ':var')})
+        self.assertEqual(route.anything, 'bar')
+        self.assertRaises(routes.RouteError, self.routes.match, ':var/:route')
+
     def test_match_not_found(self):
         """
         Should raise match error if there is no match
@@ -132,6 +272,17 @@ class KuaTest(unittest.TestCase):
         self.routes.add(':foo/:bar/:baz', 'foo')
         self.assertRaises(routes.RouteError, self.routes.match, 'foo/bar')
 
+    def test_try_match(self):
+        """
+        Should return None if there is no match
+        """
+        self.routes.add('foo/:bar', 'foo')
+        route = self.routes.try_match('/foo/bar/')
+        self.assertDictEqual(route.params, {'bar': 'bar'})
+        self.assertEqual(route.anything, 'foo')
+        self.assertIsNone(self.routes.try_match('foo'))
+        self.assertIsNone(self.routes.try_match('foo/bar/baz'))
+
     def test_match_case_sensitive(self):
         """
         Should be case sensitive (see HTTP URL spec)
@@ -176,6 +327,10 @@ class KuaTest(unittest.TestCase):
         self.assertDictEqual(route.params, {})
         self.assertEqual(route.anything, 'foo')
 
+        route = self.routes.match('//foo/bar/baz//')
+        self.assertDictEqual(route.params, {})
+        self.assertEqual(route.anything, 'foo')
+
     def test_match_var_any(self):
         """
         Should match unknown number of URL parts
@@ -242,6 +397,111 @@ class KuaTest(unittest.TestCase):
             'var1': 'foo', 'path': ('bar',), 'var2': 'baz', 'path2': ('qux',)})
         self.assertEqual(route.anything, 'qux')
 
+    def test_match_deep(self):
+        """
+        Should match patterns deeper than\
+        the generated code indentation limit
+        """
+        rts = routes.Routes(max_depth=100)
+        rts.add('/'.join(['foo'] * 80), 'foo')
+        rts.add('/'.join(['foo'] * 60 + [':bar', ':*baz']), 'bar')
+        self.assertEqual(rts.match('/'.join(['foo'] * 80)).anything, 'foo')
+
+        route = rts.match('/'.join(['foo'] * 79 + ['qux']))
+        self.assertDictEqual(route.params, {
+            'bar': 'foo', 'baz': tuple(['foo'] * 18 + ['qux'])})
+        self.assertEqual(route.anything, 'bar')
+
+        rts = routes.Routes(max_depth=5000)
+        rts.add('/'.join(':v{}'.format(i) for i in range(2000)), 'foo')
+        rts.add('/'.join('s/:v{}'.format(i) for i in range(1000)), 'bar')
+        route = rts.match('/'.join(str(i) for i in range(2000)))
+        self.assertEqual(route.anything, 'foo')
+        self.assertEqual(route.params['v1999'], '1999')
+        route = rts.match('/'.join('s/{}'.format(i) for i in range(1000)))
+        self.assertEqual(route.anything, 'bar')
+        self.assertEqual(route.params['v999'], '999')
+
+    def test_match_deep_var_any(self):
+        """
+        Should match patterns with more nested\
+        any-vars than the compiler nested blocks limit
+        """
+        rts = routes.Routes(max_depth=60)
+        rts.add('/'.join(':*a{}'.format(i) for i in range(21)), 'foo')
+        route = rts.match('/'.join(str(i) for i in range(25)))
+        self.assertEqual(route.anything, 'foo')
+        self.assertEqual(route.params['a0'], ('0',))
+        self.assertEqual(route.params['a19'], ('19',))
+        self.assertEqual(route.params['a20'], ('20', '21', '22', '23', '24'))
+
+    def test_match_many_static(self):
+        """
+        Should match patterns with many static parts at the same depth
+        """
+        for i in range(20):
+            self.routes.add('foo{}/:bar'.format(i), i)
+            self.routes.add('foo{}/:bar/:*baz'.format(i), i + 100)
+
+        self.routes.add(':foo/:bar', 'foo')
+        self.routes.compile()
+
+        for i in range(20):
+            route = self.routes.match('foo{}/bar'.format(i))
+            self.assertDictEqual(route.params, {'bar': 'bar'})
+            self.assertEqual(route.anything, i)
+            route = self.routes.match('foo{}/bar/baz/qux'.format(i))
+            self.assertDictEqual(
+                route.params, {'bar': 'bar', 'baz': ('baz', 'qux')})
+            self.assertEqual(route.anything, i + 100)
+
+        route = self.routes.match('foo20/bar')
+        self.assertDictEqual(route.params, {'foo': 'foo20', 'bar': 'bar'})
+        self.assertEqual(route.anything, 'foo')
+
+    def test_match_depth_bounds(self):
+        """
+        Should skip the branches too short\
+        or too long for the URL
+        """
+        self.routes.add('api/:foo', 'foo')
+        self.routes.add('api/:foo/:bar/baz', 'bar')
+        self.routes.add('api/v1/:*rest/qux', 'qux')
+        self.routes.add(':foo/:bar/:baz', 'baz')
+        self.assertEqual(self.routes.match('api/v1').anything, 'foo')
+        self.assertEqual(self.routes.match('api/v1/x/baz').anything, 'bar')
+        self.assertEqual(self.routes.match('api/v1/x/qux').anything, 'qux')
+        self.assertEqual(self.routes.match('api/v1/x').anything, 'baz')
+        self.assertDictEqual(
+            self.routes.match('api/v1/x/y/qux').params, {'rest': ('x', 'y')})
+        self.assertRaises(routes.RouteError, self.routes.match, 'api')
+        self.assertRaises(
+            routes.RouteError, self.routes.match, 'api/v1/x/y/z')
+
+    def test_match_route_resolved(self):
+        """
+        Should return a RouteResolved
+        """
+        self.routes.add('foo', 'foo')
+        self.routes.add('foo/:bar', 'bar')
+
+        for url in ('foo', 'foo/bar'):
+            route = self.routes.match(url)
+            self.assertIsInstance(route, routes.RouteResolved)
+            params, anything = route
+            self.assertIs(params, route.params)
+            self.assertIs(anything, route.anything)
+
+    def test_match_repeated_var(self):
+        """
+        Should keep the first part of a repeated variable
+        """
+        self.routes.add('a/:x/:x', 'foo')
+        self.routes.add('b/:*x/:x', 'bar')
+        self.assertDictEqual(self.routes.match('a/1/2').params, {'x': '1'})
+        self.assertDictEqual(
+            self.routes.match('b/1/2/3').params, {'x': ('1', '2')})
+
     def test_max_depth(self):
         """
         Should not match on max_depth < url length